@@ -4,6 +4,8 @@
 #####            SOCSEM version 8.0.1                                ###########
 ################################################################################
 
+import math
+
 import numpy as np
 
 ################################################################################
@@ -57,12 +59,48 @@ import numpy as np
 # from Whelan et al.,  2016
 # Commented out number after k and b are 1 standard deviation error
 
+# Coefficients are only given to 4-6 significant figures, so float32 arrays
+# are evaluated in single precision (half the memory traffic); everything else
+# in double
+def _kernel_dtype(x):
+    if getattr(x, 'dtype', None) == np.float32:
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+# CuPy (GPU), JAX and other array API arrays are evaluated with their own
+# exp/log, so passing e.g. cupy.asarray(soil_temp) keeps the calculation on the device
+def _array_namespace(x):
+    if isinstance(x, np.ndarray) or np.isscalar(x):
+        return None
+    if hasattr(x, '__array_namespace__'):
+        return x.__array_namespace__()
+    if type(x).__module__.split('.')[0] == 'cupy':
+        import cupy
+        return cupy
+    return None
+
+# math.exp for single values (0 once exp overflows), in-place NumPy for arrays
+def _logistic(soil_temp, a, k, b):
+    if isinstance(soil_temp, (int, float)): #includes np.float64
+        try:
+            return a/(1 + b*math.exp(-k*soil_temp))
+        except OverflowError:
+            return 0.0
+    if isinstance(soil_temp, np.ndarray) and soil_temp.ndim:
+        flux = np.multiply(soil_temp, -k)
+        np.exp(flux, out=flux)
+        flux *= b
+        flux += 1
+        return np.divide(a, flux, out=flux)
+    xp = _array_namespace(soil_temp) or np
+    return a/(1 + b*xp.exp(-k*soil_temp))
+
 #r2 = 0.96 for PRU, Los Amigos Research Station, Peru [Whelan et al. 2016]
 def OCS_rainforest_production(soil_temp):
     pru_a = 2.7*3 
     pru_k = 0.123581 # 1.46458979e-02
     pru_b = 205. # 1.01737470e+02
-    return pru_a/(1+pru_b*np.exp(-pru_k*soil_temp)) #in pmol OCS m^-2 sec^-1
+    return _logistic(soil_temp, pru_a, pru_k, pru_b) #in pmol OCS m^-2 sec^-1
 
 #We are assuming (likely incorrectly) that temperate and boreal curves are the same
 #r2 = 0.997 for WRC, Willow Creek Forest Tall Tower Site [Whelan et al. 2016]
@@ -70,21 +108,21 @@ def OCS_forest_production(soil_temp):
     wrc_a = 20.
     wrc_k = 0.160745 # 5.96007774e-03
     wrc_b = 644.7 # 1.32871427e+02
-    return wrc_a/(1+wrc_b*np.exp(-wrc_k*soil_temp)) #in pmol OCS m^-2 sec^-1
+    return _logistic(soil_temp, wrc_a, wrc_k, wrc_b) #in pmol OCS m^-2 sec^-1
 
 #r2 = 0.79 for DOE ARM SGP, a wheat field [Maseyk et al. 2014]
 def OCS_ag_production(soil_temp):
     bond_a = 83.
     ok_k = .087689 # 5.60537742e-03
     ok_b = 146.9 # 3.18441017e+01
-    return bond_a/(1+ok_b*np.exp(-ok_k*soil_temp)) #in pmol OCS m^-2 sec^-1
+    return _logistic(soil_temp, bond_a, ok_k, ok_b) #in pmol OCS m^-2 sec^-1
     
 #r2 = 0.98 for STUNT, Stunt Ranch UC Reserve, CA, savannah [Whelan et al. 2016]
 def OCS_grass_production(soil_temp):
     stunt_a = 3.9
     stunt_k = 0.115481 #1.50019288e-02
     stunt_b = 286. # 1.58117367e+02
-    return  stunt_a/(1+stunt_b*np.exp(-stunt_k*soil_temp)) #in pmol OCS m^-2 sec^-1
+    return _logistic(soil_temp, stunt_a, stunt_k, stunt_b) #in pmol OCS m^-2 sec^-1
 
 #r2 = 0.64, Mollie Beattie Habitat Community, Port Aransas, TX, [Whelan et al., 2013]
 def OCS_wetland_production(soil_temp):
@@ -92,7 +130,7 @@ def OCS_wetland_production(soil_temp):
     tx_a = 295. #max value recorded by DeLaune et al. (2002)
     tx_k = 0.07855407
     tx_b = 41.16705972
-    return tx_a/(1+tx_b*np.exp(-tx_k*soil_temp)) #in pmol OCS m^-2 sec^-1
+    return _logistic(soil_temp, tx_a, tx_k, tx_b) #in pmol OCS m^-2 sec^-1
     
 ################################################################################
 #####                  Soil COS Uptake from Atmosphere               ###########
@@ -120,29 +158,63 @@ def OCS_wetland_production(soil_temp):
 # Note that a is typically 1 to 3.  
 # a increases to ~30 when optimum soil moisture approaches the "other" moisture, theta_g
 
+#math.log for positive single values, otherwise the input's own log (nan outside its domain)
+def _log(x):
+    if isinstance(x, float) and x > 0: #includes np.float64
+        return math.log(x)
+    return (_array_namespace(x) or np).log(x)
+
 def curve_shape_a(opt_flux, flux_at_theta_g, theta_g, theta_opt):
     Rj = opt_flux/flux_at_theta_g
-    outs = np.log(Rj)
-    inversed = (np.log(theta_opt/theta_g)) + (theta_g/theta_opt - 1)
+    outs = _log(Rj)
+    inversed = (_log(theta_opt/theta_g)) + (theta_g/theta_opt - 1)
     ins = 1/inversed
     return outs*ins 
 
+#x**a * exp(-a*(x-1)) is written as exp(a*(ln(x) - x + 1)), one log and one exp
+#Constant divisors are inverted once so each element is only multiplied
+#Single values go straight to the math module, NumPy arrays are evaluated in place
+def _flux_at_all_theta_with_precomputed_a(all_theta, opt_flux, theta_opt, a):
+    inv_theta_opt = 1/theta_opt
+    if isinstance(all_theta, (int, float)) and isinstance(opt_flux, (int, float)) and isinstance(a, (int, float)):
+        #math.log is undefined for dry soil, np.log gives -inf/nan like the original and still returns a scalar
+        xp = math if all_theta*inv_theta_opt > 0.0 else np
+    else:
+        xp = _array_namespace(all_theta) or _array_namespace(opt_flux) or _array_namespace(a)
+    if xp is not None:
+        x = all_theta*inv_theta_opt
+        return opt_flux * xp.exp(a*(xp.log(x) - x + 1))
+    dtype = _kernel_dtype(all_theta)
+    opt_flux, inv_theta_opt, a = (np.asarray(c, dtype=dtype) for c in (opt_flux, inv_theta_opt, a))
+    x = np.multiply(all_theta, inv_theta_opt)
+    flux = np.log(x)
+    flux -= x
+    flux += 1
+    return opt_flux * np.exp(a*flux)
+
+#all_theta arrays are evaluated in their own precision (float32 stays float32),
+#dtype casts them first. Single values are left alone
+def _theta_as_dtype(all_theta, dtype):
+    if isinstance(all_theta, (int, float)) or _array_namespace(all_theta) is not None:
+        return all_theta
+    return np.asarray(all_theta, dtype=dtype)
+
 #This curve is used for optimizing when theta_g is allowed to change
-def flux_at_all_theta(all_theta, opt_flux, flux_at_theta_g, theta_g, theta_opt):
+def flux_at_all_theta(all_theta, opt_flux, flux_at_theta_g, theta_g, theta_opt, dtype=None):
+    if dtype is not None:
+        all_theta = _theta_as_dtype(all_theta, dtype)
     a = curve_shape_a(opt_flux, flux_at_theta_g, theta_g, theta_opt)
-    power_fct_increasing = (all_theta/theta_opt) ** a
-    exp_fct_decreasing = np.exp(-1 * a * ((all_theta/theta_opt)- 1)) 
-    return opt_flux * power_fct_increasing * exp_fct_decreasing
+    return _flux_at_all_theta_with_precomputed_a(all_theta, opt_flux, theta_opt, a)
 
 #This curve is used for optimizing when theta_g is set to CONSTANT PARAM
 #When you have observations you'd like to fit for a specific theta_g
 CONSTANT_PARAM = 35 #Arbitrary value to start with
-def flux_theta_g_constant(all_theta, opt_flux, flux_at_theta_g,theta_opt):
+def flux_theta_g_constant(all_theta, opt_flux, flux_at_theta_g,theta_opt, dtype=None):
     #theta g is set to CONSTANT_PARAM
+    if dtype is not None:
+        all_theta = _theta_as_dtype(all_theta, dtype)
     a = curve_shape_a(opt_flux, flux_at_theta_g, CONSTANT_PARAM, theta_opt)
-    power_fct_increasing = (all_theta/theta_opt) ** a
-    exp_fct_decreasing = np.exp(-1 * a * ((all_theta/theta_opt)- 1)) 
-    return opt_flux * power_fct_increasing * exp_fct_decreasing
+    return _flux_at_all_theta_with_precomputed_a(all_theta, opt_flux, theta_opt, a)
     
 ################################################################################
 ######            empirically derived coefficients                     #########
@@ -167,33 +239,87 @@ def flux_theta_g_constant(all_theta, opt_flux, flux_at_theta_g,theta_opt):
 
 # Commented numbers by fits are 1 standard deviation errors between model and observations
 
+# When both the optimum and the "other" uptake follow flux_at_all_theta in T,
+# each is c*exp(u) with u = p*log(T) - q*T + r, p = a, q = a/theta_opt,
+# r = a*(1 - log(theta_opt)). The log(Rj) needed for the soil moisture curve
+# is then log(c_opt/c_other) + u_opt - u_other, so the whole uptake is one exp
+# and neither temperature curve is evaluated on its own
+
+#All of these coefficients are constants per biome, so they are folded once at import
+def _fused_uptake_coefs(opt_curve, a_opt, other_curve, a_other, theta_g, theta_opt):
+    c_opt, c_other = opt_curve[0], other_curve[0]
+    p, q, r = a_opt, a_opt/opt_curve[3], a_opt*(1 - math.log(opt_curve[3]))
+    q_other, r_other = a_other/other_curve[3], a_other*(1 - math.log(other_curve[3]))
+    return {'c': c_opt, 'p': p, 'q': q, 'r': r,
+            'dp': a_opt - a_other, 'dq': q - q_other,
+            'dr': math.log(c_opt/c_other) + r - r_other,
+            'inv_d': 1/(math.log(theta_opt/theta_g) + theta_g/theta_opt - 1),
+            'inv_theta_opt': 1/theta_opt}
+
+def _fused_uptake(T, SW, coefs):
+    if isinstance(T, (int, float)) and isinstance(SW, (int, float)):
+        xp = math if T > 0.0 and SW > 0.0 else np
+    else:
+        xp = _array_namespace(T) or _array_namespace(SW)
+    if xp is not None:
+        log_T, x = xp.log(T), SW*coefs['inv_theta_opt']
+        return coefs['c'] * xp.exp(coefs['p']*log_T - coefs['q']*T + coefs['r']
+                                   + (xp.log(x) - x + 1)*coefs['inv_d']
+                                   * (coefs['dp']*log_T - coefs['dq']*T + coefs['dr']))
+    log_T = np.log(T)
+    x = np.multiply(SW, coefs['inv_theta_opt'])
+    sw_shape = np.log(x)
+    sw_shape -= x
+    sw_shape += 1
+    sw_shape *= coefs['inv_d']
+    log_rj = coefs['dp']*log_T
+    log_rj -= coefs['dq']*T
+    log_rj += coefs['dr']
+    flux = sw_shape*log_rj
+    flux += coefs['p']*log_T
+    flux -= coefs['q']*T
+    flux += coefs['r']
+    flux = np.exp(flux, out=flux if isinstance(flux, np.ndarray) else None)
+    flux *= coefs['c']
+    return flux
+
 #GRASSLAND SOIL
 #Based on Stunt Ranch field and lab data
 #Sun et al. (2016) and Whelan et al. (2016)
+_GRASS_OPT_T = (-4.5,   -1.48268657,  25., 10.86745456) #error 0.52,  0.21,  1.0, 1.8 
+_GRASS_OTHER_T = (-2.33809598,  -1.27719641,  25., 14.75202332) #errors  0.44,  0.50,  1.0, 2.7
+_A_GRASS_OPT = curve_shape_a(*_GRASS_OPT_T)
+_A_GRASS_OTHER = curve_shape_a(*_GRASS_OTHER_T)
 def grass_opt_sw():
     return 12.5 #based on fits to field and lab Stunt Ranch Data, error ~1.9
 def grass_opt_uptake(T):#gives us optimum uptake for different temperature curves
-    return flux_at_all_theta(T, -4.5,   -1.48268657,  25., 10.86745456) #error 0.52,  0.21,  1.0, 1.8 
+    return _flux_at_all_theta_with_precomputed_a(T, _GRASS_OPT_T[0], _GRASS_OPT_T[3], _A_GRASS_OPT)
 def grass_other_uptake(T):
-    return flux_at_all_theta(T,  -2.33809598,  -1.27719641,  25., 14.75202332)#errors  0.44,  0.50,  1.0, 2.7
+    return _flux_at_all_theta_with_precomputed_a(T, _GRASS_OTHER_T[0], _GRASS_OTHER_T[3], _A_GRASS_OTHER)
+_GRASS_UPTAKE = _fused_uptake_coefs(_GRASS_OPT_T, _A_GRASS_OPT, _GRASS_OTHER_T, _A_GRASS_OTHER,
+                                    26.9, grass_opt_sw())
 def grass_uptake(T,SW):
-    opt_uptake_for_T = grass_opt_uptake(T)
-    uptake_at_27_sw = grass_other_uptake(T)
-    return flux_at_all_theta(SW,  opt_uptake_for_T,  uptake_at_27_sw,  26.9, grass_opt_sw()) #error 0.3
+    #same as flux_at_all_theta(SW, grass_opt_uptake(T), grass_other_uptake(T), 26.9, grass_opt_sw())
+    return _fused_uptake(T, SW, _GRASS_UPTAKE) #error 0.3
 
 #BOREAL FOREST SOIL
 #Based on "Siberian" soil data from van Diest and Kesselmeier (2008) and
 #Field data from Hyytiala, Finland (Sun et al. 2018)
+_BOREAL_OPT_T = (-18.24779932, -12.,  35., 28.05488082) #error 2.3, 6.8, 2.5, 2.5
+_BOREAL_OTHER_T = (-5.89511395,  -3.76628476,  35., 28.05488082)#25.4438112) #error 1.1, 2.5, 3.5, 3.5 
+_A_BOREAL_OPT = curve_shape_a(*_BOREAL_OPT_T)
+_A_BOREAL_OTHER = curve_shape_a(*_BOREAL_OTHER_T)
 def boreal_opt_sw():
     return 12.5 #error 1.3
 def boreal_opt_uptake(T):
-    return flux_at_all_theta(T, -18.24779932, -12.,  35., 28.05488082) #error 2.3, 6.8, 2.5, 2.5
+    return _flux_at_all_theta_with_precomputed_a(T, _BOREAL_OPT_T[0], _BOREAL_OPT_T[3], _A_BOREAL_OPT)
 def boreal_other_uptake(T):
-    return flux_at_all_theta(T, -5.89511395,  -3.76628476,  35., 28.05488082)#25.4438112) #error 1.1, 2.5, 3.5, 3.5 
+    return _flux_at_all_theta_with_precomputed_a(T, _BOREAL_OTHER_T[0], _BOREAL_OTHER_T[3], _A_BOREAL_OTHER)
+_BOREAL_UPTAKE = _fused_uptake_coefs(_BOREAL_OPT_T, _A_BOREAL_OPT, _BOREAL_OTHER_T, _A_BOREAL_OTHER,
+                                     19.3, boreal_opt_sw())
 def boreal_uptake(T,SW):
-    opt_uptake_for_T = boreal_opt_uptake(T)
-    uptake_at_20_sw = boreal_other_uptake(T)
-    return flux_at_all_theta(SW,  opt_uptake_for_T,  uptake_at_20_sw,  19.3, boreal_opt_sw()) #error 0.6
+    #same as flux_at_all_theta(SW, boreal_opt_uptake(T), boreal_other_uptake(T), 19.3, boreal_opt_sw())
+    return _fused_uptake(T, SW, _BOREAL_UPTAKE) #error 0.6
 
 #TEMPERATE FOREST SOIL
 #Based on soil incubations from Willow Creek FLUXNET site (US-WCr) (Whelan et al. 2016)
@@ -211,18 +337,20 @@ def temperate_uptake(T,SW):
 
 #TROPICAL FOREST SOIL
 #Based on soil incubations from Los Amigos Research Station, Peru (Whelan et al. 2016)
+_TROPICAL_OPT_UPTAKE = -2.7 #Not enough data, the upper limit is declared to be the highest uptake via soil incubations
+_TROPICAL_OTHER_UPTAKE = -0.86 # 0.74 standard deviation error of 7 incubation measurements from 10 to 40 C
+#other uptake recorded at soil moisture 31 +/- 1.0 VWC
 def tropical_opt_sw():
     return 24.6 #Incubations of *temperate* forest soil, average of 3 values, standard deviation 0.6
 def tropical_opt_uptake(T):#gives us optimum uptake for different temperature curves
-    return -2.7 #Not enough data, the upper limit is declared to be the highest uptake via soil incubations
+    return _TROPICAL_OPT_UPTAKE
 def tropical_other_uptake(T):
-    return -0.86 # 0.74 standard deviation error of 7 incubation measurements from 10 to 40 C
-    # other uptake recorded at soil moisture 31 +/- 1.0 VWC
+    return _TROPICAL_OTHER_UPTAKE
+#Neither uptake changes with temperature, so the soil moisture curve shape is fixed
+_A_TROPICAL_SW = curve_shape_a(_TROPICAL_OPT_UPTAKE, _TROPICAL_OTHER_UPTAKE, 31., tropical_opt_sw())
 def tropical_uptake(T,SW):
-    CONSTANT_PARAM = 31.
     opt_uptake_for_T = tropical_opt_uptake(T)
-    uptake_at_31_sw = tropical_other_uptake(T)
-    return flux_at_all_theta(SW,  opt_uptake_for_T,  uptake_at_31_sw,  31., tropical_opt_sw()) #error 1.0
+    return _flux_at_all_theta_with_precomputed_a(SW,  opt_uptake_for_T,  tropical_opt_sw(), _A_TROPICAL_SW) #error 1.0
 
 #AGRICULTURAL SOIL
 #Based on soil incubations from Bondville FLUXNET site (US-Bo1) (Whelan et al. 2016)
@@ -240,11 +368,11 @@ def ag_opt_uptake():#gives us optimum uptake for different temperature curves
 def ag_other_uptake():
     return -5.36 #average of bondville soil incubations from 20.9 to 22.2 VWC
     #at various temperatures, less OCS production calculated above, error 0.78
+#Neither uptake changes with temperature, so the soil moisture curve shape is fixed
+_A_AG_SW = curve_shape_a(ag_opt_uptake(), ag_other_uptake(), 22., ag_opt_sw()) #22 VWC, error 1.1
 def ag_uptake(T,SW):
-    CONSTANT_PARAM = 22. #error 1.1
     opt_uptake_for_T = ag_opt_uptake()
-    uptake_at_22_sw = ag_other_uptake()
-    return flux_at_all_theta(SW,  opt_uptake_for_T,  uptake_at_22_sw,  22., ag_opt_sw()) #error 1.1
+    return _flux_at_all_theta_with_precomputed_a(SW,  opt_uptake_for_T,  ag_opt_sw(), _A_AG_SW) #error 1.1
 
 ################################################################################
 ######            soil uptake and emission together                   ##########
@@ -257,84 +385,83 @@ def ag_uptake(T,SW):
 #Wetland emissions are so large that it seems like uptake is a mild 
 #uncertainty in production
 
-def grass_soil_OCS(temperature, soilw):
-    if np.isscalar(temperature) and temperature > 0.0:
-        biotic_flux = grass_uptake(temperature,soilw)
-        abiotic_flux = OCS_grass_production(temperature)
-        return biotic_flux + abiotic_flux
-    if np.isscalar(temperature)==False: 
-        out = np.array(temperature)*0.0
-        justright = np.where(temperature>0.0)
-        biotic_flux = grass_uptake(temperature[justright],soilw[justright])
-        abiotic_flux = OCS_grass_production(temperature[justright])
-        out[justright] = biotic_flux + abiotic_flux
-        return out
-    else: 
+#Fully thawed inputs (e.g. small repeated calls in the growing season) skip the mask
+#Mostly thawed inputs are evaluated over the whole array and frozen soils are zeroed
+#at the end, in place in the flux buffer rather than in a new zero-filled array
+#Frozen temperatures are swapped for 1 C first so the uptake curves stay in their domain
+#Mostly frozen inputs are compressed to the thawed cells with the boolean mask instead
+#Single values (including 0-d arrays) return a float without allocating anything
+def _above_freezing_OCS(temperature, soilw, uptake, production, dtype):
+    scalar = isinstance(temperature, (int, float)) and isinstance(soilw, (int, float))
+    if not scalar and np.ndim(temperature) == 0 and np.ndim(soilw) == 0:
+        temperature, soilw, scalar = float(temperature), float(soilw), True
+    if scalar:
+        if temperature > 0.0:
+            return float(uptake(temperature, soilw) + production(temperature))
         return 0.0
+    t = np.asarray(temperature, dtype=dtype)
+    s = np.asarray(soilw, dtype=dtype)
+    thawed = t > 0.0
+    n_thawed = np.count_nonzero(thawed)
+    if n_thawed == thawed.size:
+        return np.asarray(uptake(t, s) + production(t), dtype=dtype)[()]
+    if t.ndim > 0 and 2*n_thawed < thawed.size:
+        t, s, thawed = np.broadcast_arrays(t, s, thawed)
+        flux = np.zeros(t.shape, dtype=dtype)
+        t_thawed = t[thawed]
+        flux[thawed] = uptake(t_thawed, s[thawed]) + production(t_thawed)
+        return flux
+    t_safe = np.where(thawed, t, 1.0)
+    flux = np.asarray(uptake(t_safe, s) + production(t_safe), dtype=dtype)
+    np.copyto(flux, 0.0, where=~thawed)
+    return flux[()]
+
+def grass_soil_OCS(temperature, soilw, dtype=np.float64):
+    return _above_freezing_OCS(temperature, soilw, grass_uptake, OCS_grass_production, dtype)
     
-def bforest_soil_OCS(temperature, soilw, avg_T = 20, avg_SW = 20):
-    if np.isscalar(temperature) and temperature > 0.0:
-        biotic_flux = boreal_uptake(temperature,soilw)
-        abiotic_flux = OCS_forest_production(temperature)
-        return biotic_flux + abiotic_flux
-    if np.isscalar(temperature)==False:
-        out = np.array(temperature)*0.0
-        justright = np.where(temperature>0.0)
-        biotic_flux = boreal_uptake(temperature[justright],soilw[justright])
-        abiotic_flux = OCS_forest_production(temperature[justright])
-        out[justright] = biotic_flux + abiotic_flux
-        return out
-    else:
-        return 0.0
+def bforest_soil_OCS(temperature, soilw, avg_T = 20, avg_SW = 20, dtype=np.float64):
+    return _above_freezing_OCS(temperature, soilw, boreal_uptake, OCS_forest_production, dtype)
 
-def tforest_soil_OCS(temperature, soilw, avg_T = 20, avg_SW = 20):
-    if np.isscalar(temperature) and temperature > 0.0:
-        biotic_flux = temperate_uptake(temperature,soilw)
-        abiotic_flux = OCS_forest_production(temperature)
-        return biotic_flux + abiotic_flux
-    if np.isscalar(temperature)==False:
-        out = np.array(temperature)*0.0
-        justright = np.where(temperature>0.0)
-        biotic_flux = temperate_uptake(temperature[justright],soilw[justright])
-        abiotic_flux = OCS_forest_production(temperature[justright])
-        out[justright] = biotic_flux + abiotic_flux
-        return out   
-    else:
-        return 0.0
+def tforest_soil_OCS(temperature, soilw, avg_T = 20, avg_SW = 20, dtype=np.float64):
+    return _above_freezing_OCS(temperature, soilw, temperate_uptake, OCS_forest_production, dtype)
 
-def tropforest_soil_OCS(temperature, soilw, avg_T = 20, avg_SW = 20):
-    if np.isscalar(temperature) and temperature > 0.0:
-        biotic_flux = tropical_uptake(temperature,soilw)
-        abiotic_flux = OCS_rainforest_production(temperature)
-        return biotic_flux + abiotic_flux
-    if np.isscalar(temperature)==False:
-        out = np.array(temperature)*0.0
-        justright = np.where(temperature>0.0)
-        biotic_flux = tropical_uptake(temperature[justright],soilw[justright])
-        abiotic_flux = OCS_rainforest_production(temperature[justright])
-        out[justright] = biotic_flux + abiotic_flux
-        return out   
-    else:
-        return 0.0
+def tropforest_soil_OCS(temperature, soilw, avg_T = 20, avg_SW = 20, dtype=np.float64):
+    return _above_freezing_OCS(temperature, soilw, tropical_uptake, OCS_rainforest_production, dtype)
         
-def ag_soil_OCS(temperature, soilw):
-    if np.isscalar(temperature) and temperature > 0.0:
-        biotic_flux = ag_uptake(temperature,soilw)
-        abiotic_flux = OCS_ag_production(temperature)
-        return biotic_flux + abiotic_flux
-    if np.isscalar(temperature)==False:
-        out = np.array(temperature)*0.0
-        justright = np.where(temperature>0.0)
-        biotic_flux = ag_uptake(temperature[justright],soilw[justright])
-        abiotic_flux = OCS_ag_production(temperature[justright])
-        out[justright] = biotic_flux + abiotic_flux
-        return out
-    else:
-        return 0.0
+def ag_soil_OCS(temperature, soilw, dtype=np.float64):
+    return _above_freezing_OCS(temperature, soilw, ag_uptake, OCS_ag_production, dtype)
 
-def wetland_OCS(temperature, soilw=0):
+def wetland_OCS(temperature, soilw=0, dtype=np.float64):
+    if not isinstance(temperature, (int, float)) and _array_namespace(temperature) is None:
+        temperature = np.asarray(temperature, dtype=dtype)
     return OCS_wetland_production(temperature)
 
+################################################################################
+######            all biomes from a landcover map                     ##########
+################################################################################
+#For a landcover map, soil_OCS_by_biome gathers the cells of each biome once and
+#hands them to that biome's function above, so a map and a single biome are
+#evaluated by the same code
+#biome_id uses the codes below. Desert and ice are ~0 OCS exchange and tundra
+#has no data yet (see README), so mask or remap those before calling
+GRASS, BOREAL_FOREST, TEMPERATE_FOREST, TROPICAL_FOREST, AGRICULTURE, WETLAND = range(6)
+_BIOME_SOIL_OCS = (grass_soil_OCS, bforest_soil_OCS, tforest_soil_OCS,
+                   tropforest_soil_OCS, ag_soil_OCS, wetland_OCS)
+
+def soil_OCS_by_biome(biome_id, temperature, soilw, dtype=np.float64):
+    biome, T, SW = np.broadcast_arrays(np.asarray(biome_id),
+        np.asarray(temperature, dtype=dtype), np.asarray(soilw, dtype=dtype))
+    shape = biome.shape
+    biome, T, SW = biome.ravel(), T.ravel(), SW.ravel()
+    cells = [np.flatnonzero(biome == code) for code in range(len(_BIOME_SOIL_OCS))]
+    if sum(biome_cells.size for biome_cells in cells) != biome.size: #negative, too large, fractional or NaN ids
+        raise ValueError("biome_id must be one of the biome codes GRASS (0) to WETLAND (5)")
+    out = np.empty(biome.size, dtype=dtype)
+    for biome_cells, soil_OCS in zip(cells, _BIOME_SOIL_OCS):
+        if biome_cells.size:
+            out[biome_cells] = soil_OCS(T[biome_cells], SW[biome_cells], dtype=dtype)
+    return out.reshape(shape)[()]
+
 '''
 Works Cited
 Whelan et al. 2016 https://doi.org/10.5194/acp-16-3711-2016
@@ -0,0 +1,80 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'src'))
+from SOCSEM import COS_abiotic_biotic_soil_flux as socsem
+
+#Stands in for a CuPy or JAX array: not an ndarray, only exposes the array API
+#functions the model uses and refuses to be copied into a NumPy array
+class _StubArray:
+    __array_ufunc__ = None #NumPy defers to the reflected operators below
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float64)
+
+    def __array_namespace__(self, api_version=None):
+        return _STUB_NAMESPACE
+
+    def __array__(self, *args, **kwargs):
+        raise TypeError("stub arrays must not be converted to NumPy arrays")
+
+    def __neg__(self):
+        return _StubArray(-self.data)
+
+def _operator(ufunc, reflected=False):
+    def method(self, other):
+        other = other.data if isinstance(other, _StubArray) else other
+        return _StubArray(ufunc(other, self.data) if reflected else ufunc(self.data, other))
+    return method
+
+for _name, _ufunc in (('add', np.add), ('sub', np.subtract), ('mul', np.multiply), ('truediv', np.true_divide)):
+    setattr(_StubArray, '__%s__' % _name, _operator(_ufunc))
+    setattr(_StubArray, '__r%s__' % _name, _operator(_ufunc, reflected=True))
+
+class _StubNamespace:
+    @staticmethod
+    def exp(x):
+        return _StubArray(np.exp(x.data))
+
+    @staticmethod
+    def log(x):
+        return _StubArray(np.log(x.data))
+
+_STUB_NAMESPACE = _StubNamespace()
+
+class ArrayNamespaceTest(unittest.TestCase):
+    T = np.array([5., 8., 15., 25., 35.])
+    SW = np.array([5., 12., 20., 30., 40.])
+
+    def assert_stays_on_namespace(self, result, expected):
+        self.assertIsInstance(result, _StubArray)
+        np.testing.assert_allclose(result.data, expected, rtol=1e-12)
+
+    def test_production(self):
+        for production in (socsem.OCS_rainforest_production, socsem.OCS_forest_production,
+                           socsem.OCS_ag_production, socsem.OCS_grass_production,
+                           socsem.OCS_wetland_production):
+            self.assert_stays_on_namespace(production(_StubArray(self.T)), production(self.T))
+
+    def test_uptake(self):
+        for uptake in (socsem.grass_uptake, socsem.boreal_uptake, socsem.temperate_uptake,
+                       socsem.tropical_uptake, socsem.ag_uptake):
+            self.assert_stays_on_namespace(uptake(_StubArray(self.T), _StubArray(self.SW)),
+                                           uptake(self.T, self.SW))
+
+    def test_soil_moisture_curves(self):
+        other = -0.17629655*self.T + 0.47914552
+        self.assert_stays_on_namespace(
+            socsem.flux_at_all_theta(_StubArray(self.SW), -12.6, _StubArray(other), 51., 24.6, dtype=np.float32),
+            socsem.flux_at_all_theta(self.SW, -12.6, other, 51., 24.6))
+        self.assert_stays_on_namespace(socsem.curve_shape_a(-12.6, _StubArray(other), 51., 24.6),
+                                       socsem.curve_shape_a(-12.6, other, 51., 24.6))
+
+    def test_wetland(self):
+        self.assert_stays_on_namespace(socsem.wetland_OCS(_StubArray(self.T)), socsem.wetland_OCS(self.T))
+
+if __name__ == '__main__':
+    unittest.main()
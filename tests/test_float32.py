@@ -0,0 +1,32 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'src'))
+from SOCSEM import COS_abiotic_biotic_soil_flux as socsem
+
+#Just above 0 C the grass and boreal temperature curves underflow in float32,
+#which used to give nan instead of the production flux
+class Float32NearFreezingTest(unittest.TestCase):
+    T = np.array([0.001, 0.005, 0.01, 0.02, 0.5, 20.])
+    SW = np.full(6, 20.)
+
+    def assert_matches_float64(self, single, double):
+        self.assertEqual(single.dtype, np.float32)
+        self.assertFalse(np.isnan(single).any())
+        np.testing.assert_allclose(single, double, rtol=1e-4, atol=1e-6)
+
+    def test_soil_OCS_functions(self):
+        for soil_OCS in (socsem.grass_soil_OCS, socsem.bforest_soil_OCS):
+            self.assert_matches_float64(soil_OCS(self.T, self.SW, dtype=np.float32),
+                                        soil_OCS(self.T, self.SW))
+
+    def test_soil_OCS_by_biome(self):
+        for biome in (socsem.GRASS, socsem.BOREAL_FOREST):
+            self.assert_matches_float64(socsem.soil_OCS_by_biome(biome, self.T, self.SW, dtype=np.float32),
+                                        socsem.soil_OCS_by_biome(biome, self.T, self.SW))
+
+if __name__ == '__main__':
+    unittest.main()
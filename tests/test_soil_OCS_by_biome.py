@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'src'))
+from SOCSEM import COS_abiotic_biotic_soil_flux as socsem
+
+_SOIL_OCS = (socsem.grass_soil_OCS, socsem.bforest_soil_OCS, socsem.tforest_soil_OCS,
+             socsem.tropforest_soil_OCS, socsem.ag_soil_OCS, socsem.wetland_OCS)
+
+#v8.0.1 fluxes before vectorization, in biome code order, at (T, SW) of
+#(5, 10), (15, 20), (30, 35) and (-2, 20)
+_POINTS_T = np.array([5., 15., 30., -2.])
+_POINTS_SW = np.array([10., 20., 35., 20.])
+_REFERENCE = np.array([
+    [-2.3049532189696706, -3.2176015604914947, -0.2936483921101534, 0.],
+    [0.06905268406197354, 0.03884320207765091, 3.225673106456445, 0.],
+    [-0.5161119884456041, -11.032800158571991, -7.121667273290771, 0.],
+    [0.07262474586509171, -0.9782853930641622, 1.1748372928837039, 0.],
+    [0.45827316719463645, -6.0395743687925965, 7.156865180619432, 0.],
+    [10.244716327402491, 21.57829493471762, 60.2021763545726, 5.999533681521409]])
+
+class SoilOCSByBiomeTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.biome = rng.integers(socsem.GRASS, socsem.WETLAND + 1, (40, 50))
+        self.T = rng.uniform(-10., 40., self.biome.shape) #about a fifth of the cells frozen
+        self.SW = rng.uniform(2., 45., self.biome.shape)
+
+    def test_matches_per_biome_functions(self):
+        flux = socsem.soil_OCS_by_biome(self.biome, self.T, self.SW)
+        self.assertEqual(flux.shape, self.biome.shape)
+        for code, soil_OCS in enumerate(_SOIL_OCS):
+            cells = self.biome == code
+            #temperate forest is nan where the other uptake changes sign
+            np.testing.assert_allclose(flux[cells], soil_OCS(self.T[cells], self.SW[cells]),
+                                       rtol=1e-11, equal_nan=True)
+        frozen = (self.T <= 0.) & (self.biome != socsem.WETLAND)
+        self.assertTrue((flux[frozen] == 0.).all())
+
+    def test_reference_values(self):
+        biome = np.repeat(np.arange(len(_SOIL_OCS))[:, None], _POINTS_T.size, axis=1)
+        np.testing.assert_allclose(socsem.soil_OCS_by_biome(biome, _POINTS_T, _POINTS_SW),
+                                   _REFERENCE, rtol=1e-9, atol=1e-12)
+
+    def test_single_values(self):
+        for code, soil_OCS in enumerate(_SOIL_OCS):
+            for T, SW in ((15., 20.), (-2., 20.), (np.array(15.), np.array(20.))):
+                flux = socsem.soil_OCS_by_biome(code, T, SW)
+                self.assertEqual(np.ndim(flux), 0)
+                np.testing.assert_allclose(flux, soil_OCS(T, SW), rtol=1e-12)
+
+    def test_whole_number_float_ids(self):
+        np.testing.assert_array_equal(socsem.soil_OCS_by_biome(np.array([0., 5.]), 15., 20.),
+                                      socsem.soil_OCS_by_biome(np.array([0, 5]), 15., 20.))
+
+    def test_invalid_biome_ids(self):
+        for biome_id in (-1, 6, [0, 7], [0., np.nan], [0., 2.5]):
+            with self.assertRaises(ValueError):
+                socsem.soil_OCS_by_biome(biome_id, 15., 20.)
+        with self.assertRaises(ValueError):
+            socsem.soil_OCS_by_biome(np.array([0., np.nan, 2.5]), [5, 10, 20], [10, 20, 30])
+
+if __name__ == '__main__':
+    unittest.main()